@@ -1,19 +1,18 @@
-import RPi.GPIO as GPIO
+from gpiozero import DigitalOutputDevice
 import time
 
 RELAY_PIN = 12
 
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(RELAY_PIN, GPIO.OUT)
+# relay is active low
+relay = DigitalOutputDevice(RELAY_PIN, active_high=False, initial_value=False)
 
 try:
     print("Fan ON for 5 seconds")
-    GPIO.output(RELAY_PIN, GPIO.LOW)  # Relay ON
+    relay.on()  # Relay ON
     time.sleep(5)
 
     print("Fan OFF")
-    GPIO.output(RELAY_PIN, GPIO.HIGH)  # Relay OFF
+    relay.off()  # Relay OFF
 
 finally:
-    GPIO.cleanup()
-
+    relay.close()
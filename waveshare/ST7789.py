@@ -126,22 +126,41 @@ class ST7789(config.RaspberryPi):
         if imwidth != self.width or imheight != self.height:
             raise ValueError('Image must be same dimensions as display \
                 ({0}x{1}).' .format(self.width, self.height))
+        self.ShowImageWindow(Image, 0, 0)
+
+    def ShowImageWindow(self, Image, Xstart, Ystart):
+        """Write Image to the display with its top-left corner at (Xstart, Ystart)"""
+        """Only that window is transferred; the rest of the panel keeps its content"""
+        imwidth, imheight = Image.size
+        if Xstart + imwidth > self.width or Ystart + imheight > self.height:
+            raise ValueError('Window ({0},{1}) {2}x{3} exceeds display ({4}x{5}).'
+                .format(Xstart, Ystart, imwidth, imheight, self.width, self.height))
         img = self.np.asarray(Image)
-        pix = self.np.zeros((self.width,self.height,2), dtype = self.np.uint8)
+        pix = self.np.zeros((imheight,imwidth,2), dtype = self.np.uint8)
         pix[...,[0]] = self.np.add(self.np.bitwise_and(img[...,[0]],0xF8),self.np.right_shift(img[...,[1]],5))
         pix[...,[1]] = self.np.add(self.np.bitwise_and(self.np.left_shift(img[...,[1]],3),0xE0),self.np.right_shift(img[...,[2]],3))
-        pix = pix.flatten().tolist()
-        self.SetWindows ( 0, 0, self.width, self.height)
+        self.SetWindows ( Xstart, Ystart, Xstart + imwidth, Ystart + imheight)
         self.digital_write(self.GPIO_DC_PIN,True)
-        for i in range(0,len(pix),4096):
-            self.spi_writebyte(pix[i:i+4096])		
+        # the array goes out as is; no list of Python ints, no 4096 byte chunks
+        self.spi_writebytes2(pix)
         
+    def ShowRGB565Window(self, pix, Xstart, Ystart):
+        """Write a (height, width) array of big-endian RGB565 pixels at (Xstart, Ystart)"""
+        """The buffer goes out in one writebytes2 call, without converting to a list"""
+        imheight, imwidth = pix.shape
+        if Xstart + imwidth > self.width or Ystart + imheight > self.height:
+            raise ValueError('Window ({0},{1}) {2}x{3} exceeds display ({4}x{5}).'
+                .format(Xstart, Ystart, imwidth, imheight, self.width, self.height))
+        pix = self.np.ascontiguousarray(pix, dtype='>u2')
+        self.SetWindows ( Xstart, Ystart, Xstart + imwidth, Ystart + imheight)
+        self.digital_write(self.GPIO_DC_PIN,True)
+        self.spi_writebytes2(pix)
+
     def clear(self):
         """Clear contents of image buffer"""
-        _buffer = [0xff]*(self.width * self.height * 2)
+        _buffer = bytes([0xff]) * (self.width * self.height * 2)
         self.SetWindows ( 0, 0, self.width, self.height)
         self.digital_write(self.GPIO_DC_PIN,True)
-        for i in range(0,len(_buffer),4096):
-            self.spi_writebyte(_buffer[i:i+4096])	        
+        self.spi_writebytes2(_buffer)
         
 
@@ -108,6 +108,11 @@ class RaspberryPi:
         if self.SPI!=None :
             self.SPI.writebytes(data)
 
+    def spi_writebytes2(self, data):
+        # takes any buffer (bytes, numpy array) and splits large ones itself
+        if self.SPI!=None :
+            self.SPI.writebytes2(data)
+
     def bl_DutyCycle(self, duty):
         self.GPIO_BL_PIN.value = duty / 100
         
@@ -1,26 +1,34 @@
 # -*- coding:utf-8 -*-
-import json
+import asyncio
+import functools
 import logging
 import os.path as _p
 import sys
 import time
-from collections import deque
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
 from pprint import pprint
-from typing import Deque, Dict, List, Literal, Optional, Tuple
+from typing import Dict, List, Literal, Optional, Tuple
 
-import paho.mqtt.publish as publish
-import RPi.GPIO as GPIO
+import numpy as np
+import paho.mqtt.client as mqtt
 import spidev as SPI
 import yaml
-from PIL import Image, ImageDraw, ImageFont
+from gpiozero import DigitalOutputDevice
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFont
 
+from temper.temper import Temper
 from waveshare import ST7789
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the NumPy sparkline path is used instead
+    njit = None
+
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.DEBUG if "--debug" in sys.argv[1:] else logging.INFO,
     format="%(asctime)s.%(msecs)03d %(levelname)s: %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S",
 )
@@ -32,6 +40,8 @@ class MQTTConfig:
     should_push: bool
     host: str
     port: int
+    # keep the last reading on the broker for subscribers that connect later
+    retain: bool = True
 
 
 @dataclass
@@ -56,11 +66,14 @@ class GlobalConfig:
 
     # GPIO settings
     heat_plate_relay_gpio: int = 12
+    # Release the relay pin (switch it to input) to turn the relay off; set to
+    # false to drive the pin high instead, on relay boards known to switch off
+    # that way
+    heat_plate_relay_tristate: bool = True
 
     @classmethod
     def from_yaml(cls, yaml_path: str) -> "GlobalConfig":
-        with open(yaml_path) as ifile:
-            raw_settings = yaml.safe_load(ifile)
+        raw_settings = _load_yaml_cached(yaml_path)
 
         # Convert calibration points to proper objects
         calibration_points = [
@@ -74,9 +87,27 @@ class GlobalConfig:
             should_push=mqtt_settings.get("should_push", False),
             host=mqtt_settings.get("host", "localhost"),
             port=mqtt_settings.get("port", 1883),
+            retain=mqtt_settings.get("retain", True),
         )
 
-        return cls(calibration_points=calibration_points, mqtt=mqtt_config)
+        return cls(
+            calibration_points=calibration_points,
+            mqtt=mqtt_config,
+            heat_plate_relay_tristate=raw_settings.get(
+                "heat_plate_relay_tristate", True
+            ),
+        )
+
+
+# libyaml's parser when PyYAML was built against it, the pure-Python one otherwise
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_yaml_cached(yaml_path: str) -> dict:
+    """Parse a yaml file once per process; treat the result as read-only."""
+    with open(yaml_path) as ifile:
+        return yaml.load(ifile, Loader=_YamlLoader) or {}
 
 
 # Load global configuration
@@ -89,45 +120,87 @@ mqtt:
   should_push: false
   host: 192.168.1.131
   port: 1883
+  retain: true
+# false to switch the relay off by driving its pin high instead of releasing it
+heat_plate_relay_tristate: true
 """
 CONFIG = GlobalConfig.from_yaml("settings.yaml")
-pprint(CONFIG)
+if logger.isEnabledFor(logging.DEBUG):
+    pprint(CONFIG)
+
+# Initialize the relay GPIO (BCM numbering); active low, starts off.
+# gpiozero picks the pin backend (lgpio / gpiod character device on current
+# Raspberry Pi OS), the same as the display HAT's buttons and backlight.
+heat_plate_relay = DigitalOutputDevice(
+    CONFIG.heat_plate_relay_gpio, active_high=False, initial_value=False
+)
 
-# Initialize GPIO
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(CONFIG.heat_plate_relay_gpio, GPIO.OUT)
 
+class MQTTPublisher:
+    """A single long-lived broker connection; paho's network thread does the I/O."""
 
-def mqtt_publish(broker_host: str, broker_port: int, topic: str, payload: str):
-    """Publish an MQTT message using paho-mqtt in one shot."""
-    try:
-        publish.single(topic, payload=payload, hostname=broker_host, port=broker_port)
-    except Exception as e:
-        logger.warning("Failed to push MQTT message: %s", e)
-        logger.debug("Failed payload: %s", payload)
+    def __init__(
+        self, host: str, port: int, client_id: str = "heatplate", retain: bool = True
+    ):
+        self._retain = retain
+        if hasattr(mqtt, "CallbackAPIVersion"):  # paho-mqtt >= 2.0
+            self._client = mqtt.Client(
+                mqtt.CallbackAPIVersion.VERSION2,
+                client_id=client_id,
+                clean_session=True,
+            )
+        else:
+            self._client = mqtt.Client(client_id=client_id, clean_session=True)
+        # the network loop reconnects on its own after a dropped connection
+        self._client.reconnect_delay_set(min_delay=1, max_delay=60)
+        self._client.connect_async(host, port)
+        self._client.loop_start()
+
+    def publish(self, topic: str, payload: str):
+        """Enqueue a message; does not wait for the broker."""
+        info = self._client.publish(topic, payload=payload, qos=0, retain=self._retain)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.warning(
+                "Failed to push MQTT message: %s", mqtt.error_string(info.rc)
+            )
+            logger.debug("Failed payload: %s", payload)
+
+    def close(self):
+        self._client.disconnect()
+        self._client.loop_stop()
+
+
+mqtt_publisher = MQTTPublisher(
+    CONFIG.mqtt.host, CONFIG.mqtt.port, retain=CONFIG.mqtt.retain
+)
 
 
 @dataclass
 class DisplayConfig:
     LCD_BRIGHTNESS_LEVELS = (0, 10, 70)
-    LCD_BRIGHTNESS = LCD_BRIGHTNESS_LEVELS[1]
-    _previous_brightness = LCD_BRIGHTNESS_LEVELS[1]  # Track previous brightness
+    # position of LCD_BRIGHTNESS in LCD_BRIGHTNESS_LEVELS, for cycling
+    _brightness_index = 1
+    LCD_BRIGHTNESS = LCD_BRIGHTNESS_LEVELS[_brightness_index]
 
     @classmethod
     def update_brightness(cls, new_brightness: int):
-        """Update brightness and track the change."""
-        cls._previous_brightness = cls.LCD_BRIGHTNESS
+        """Update brightness; it is applied to the backlight on the next render."""
         cls.LCD_BRIGHTNESS = new_brightness
+        if new_brightness in cls.LCD_BRIGHTNESS_LEVELS:
+            cls._brightness_index = cls.LCD_BRIGHTNESS_LEVELS.index(new_brightness)
 
     @classmethod
-    def brightness_changed(cls) -> bool:
-        """Check if brightness has changed since last update."""
-        return cls.LCD_BRIGHTNESS != cls._previous_brightness
+    def cycle_brightness(cls):
+        """Switch to the next brightness level, wrapping around."""
+        cls._brightness_index = (cls._brightness_index + 1) % len(
+            cls.LCD_BRIGHTNESS_LEVELS
+        )
+        cls.LCD_BRIGHTNESS = cls.LCD_BRIGHTNESS_LEVELS[cls._brightness_index]
 
 
 @dataclass
 class Measurement:
-    time: datetime
+    time: float  # epoch seconds; convert with datetime.fromtimestamp() for display
     raw_celsius: float
     calibrated_celsius: float
 
@@ -137,25 +210,24 @@ class TemperatureGetter:
 
     @classmethod
     def get_current_measurement(cls):
-        if cls._singleton is None:
-            cls._singleton = cls()
-        latest_result = cls._singleton.get_readout()
+        getter = cls._singleton
+        if getter is None:
+            getter = cls._singleton = cls()
+        latest_result = getter.get_readout()
         # temper2 also has internal temperature
         # latest_resultresult["internal temperature"],
         raw_celsius = latest_result.get("external temperature")
         if raw_celsius is None:
             calibrated_celsius = None
         else:
-            calibrated_celsius = round(cls._singleton.apply_calibration(raw_celsius), 1)
+            calibrated_celsius = round(getter.apply_calibration(raw_celsius), 1)
         return Measurement(
-            time=datetime.now(timezone.utc),
+            time=time.time(),
             raw_celsius=raw_celsius,
             calibrated_celsius=calibrated_celsius,
         )
 
     def __init__(self):
-        from temper.temper import Temper
-
         self._temper = Temper()
         self.calibrate_sensor(CONFIG.calibration_points)
 
@@ -167,31 +239,72 @@ class TemperatureGetter:
         result = results[0]
         return result
 
-    def apply_calibration(self, raw_temp: float) -> float:
-        if self._calibration is None:
-            return raw_temp
-        slope, intercept = self._calibration
-        return raw_temp * slope + intercept
-
     def calibrate_sensor(self, calibration_points: List[CalibrationPoint]):
-        """Given (sensor_readout, actual_temperature) pairs, compute calibration."""
-        import numpy as np
-
+        """Given (sensor_readout, actual_temperature) pairs, install apply_calibration."""
         if not calibration_points:
             logger.warning("No calibration points provided, using raw temperature")
-            self._calibration = None
+            self.apply_calibration = lambda raw_temp: raw_temp
             return
 
-        sensor_readouts = [point.sensor for point in calibration_points]
-        actual_temperatures = [point.actual for point in calibration_points]
-        slope, intercept = np.polyfit(sensor_readouts, actual_temperatures, 1)
-        self._calibration = (slope, intercept)
+        # least-squares line through the points; it's a handful of values, so
+        # plain Python is quicker than importing numpy for polyfit
+        n = len(calibration_points)
+        mean_sensor = sum(point.sensor for point in calibration_points) / n
+        mean_actual = sum(point.actual for point in calibration_points) / n
+        spread = sum((point.sensor - mean_sensor) ** 2 for point in calibration_points)
+        if spread == 0:
+            logger.warning("Calibration points share one sensor value; offset only")
+            slope = 1.0
+        else:
+            slope = (
+                sum(
+                    (point.sensor - mean_sensor) * (point.actual - mean_actual)
+                    for point in calibration_points
+                )
+                / spread
+            )
+        intercept = mean_actual - slope * mean_sensor
+        self.apply_calibration = lambda raw_temp, s=slope, i=intercept: raw_temp * s + i
         logger.info(
             "Calibration computed: slope=%.3f, intercept=%.3f", slope, intercept
         )
 
 
+@functools.lru_cache(maxsize=16)
+def _load_truetype(font_path: str, font_size: float) -> ImageFont.FreeTypeFont:
+    """Parse each font file and size only once, however many canvases load it."""
+    # checked here so a font that is already loaded costs no stat call
+    if not _p.exists(font_path):
+        raise FileNotFoundError(f"Font file not found: {font_path}")
+    return ImageFont.truetype(font_path, font_size)
+
+
 class Canvas:
+    HISTORY_LENGTH = 100
+    TEXT_CACHE_SIZE = 64
+    PRELOADED_GLYPHS = "0123456789.-~ C"
+    # dirty regions covering more than this share of the screen are diffed as
+    # one full frame
+    FULL_FRAME_FRACTION = 0.6
+    # counter-clockwise quarter turns, like Image.rotate and np.rot90
+    _QUARTER_TURNS = {90: 1, 180: 2, 270: 3}
+
+    # pixel offsets PIL fills for a 3x3 rectangle / ellipse around a point
+    _POINT_STAMPS = {
+        "square": np.array(
+            [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)], dtype=np.intp
+        ),
+        "circle": np.array([(0, -1), (-1, 0), (0, 0), (1, 0), (0, 1)], dtype=np.intp),
+    }
+    # button shape name -> ImageDraw method that draws it
+    _SHAPE_DRAWERS = {
+        "polygon": ImageDraw.ImageDraw.polygon,
+        "rectangle": ImageDraw.ImageDraw.rectangle,
+        "ellipse": ImageDraw.ImageDraw.ellipse,
+    }
+    # palette indices of the sparkline buffer
+    _SPARK_BG, _SPARK_TOP, _SPARK_BOTTOM, _SPARK_GRID, _SPARK_POINT = range(5)
+
     def __init__(
         self,
         width,
@@ -203,8 +316,49 @@ class Canvas:
         self.image = Image.new("RGB", (width, height), bg_color)
         self.draw = ImageDraw.Draw(self.image)
         self.fonts = {}
-
-        self.temperature_records: Deque[Measurement] = deque(maxlen=100)
+        # (font_key, char) -> (mask or None, left, top, advance)
+        self._glyphs: Dict[
+            Tuple[Tuple[str, float], str],
+            Tuple[Optional[Image.Image], int, int, float],
+        ] = {}
+        # (text, font_key) -> (mask of the whole string, x offset, y offset),
+        # least recently used first
+        self._text_masks: OrderedDict = OrderedDict()
+        # labels registered with preload_text, kept outside the LRU
+        self._static_text_masks: Dict[
+            Tuple[str, Tuple[str, float]], Optional[tuple]
+        ] = {}
+
+        # Measurement history as parallel ring buffers; _idx is the next slot
+        # to write and _count the number of valid entries. Every value is
+        # stored twice, HISTORY_LENGTH apart, so the history in order is always
+        # one contiguous slice.
+        self._ts = np.full(2 * self.HISTORY_LENGTH, np.nan, dtype=np.float64)
+        self._raw = np.full(2 * self.HISTORY_LENGTH, np.nan, dtype=np.float64)
+        self._cal = np.full(2 * self.HISTORY_LENGTH, np.nan, dtype=np.float64)
+        self._idx = 0
+        self._count = 0
+        # bumped on every append, lets callers tell whether the history changed
+        self.history_version = 0
+        self._spark_buf: Optional[np.ndarray] = None
+        # (w, h, min_temp, max_temp) -> sparkline grid template
+        self._grid_cache: Dict[Tuple, np.ndarray] = {}
+        # (shape_type, shape_data, fill) -> (sprite, mask, box) of a button
+        self._button_sprites: Dict[Tuple, Tuple[Image.Image, Image.Image, Tuple]] = {}
+        self._background = self.image.copy()
+        self._applied_brightness: Optional[int] = None
+        # what the panel currently shows, as big-endian RGB565, to find the
+        # region that changed
+        self._fb565: Optional[np.ndarray] = None
+        # staging buffer the canvas is packed into before the diff, reused
+        # every frame
+        self._frame565 = np.empty((height, width), dtype=">u2")
+        # rotation the framebuffer content was rendered with
+        self._fb565_angle: Optional[int] = None
+        # (x0, y0, x1, y1) boxes touched since the last render_to_display
+        self._dirty: List[Tuple[int, int, int, int]] = []
+        # widget name -> (state it was drawn with, boxes it covers)
+        self._widgets: Dict[str, Tuple[object, List[Tuple[int, int, int, int]]]] = {}
 
         # Attempt to load the default font immediately
         try:
@@ -214,13 +368,34 @@ class Canvas:
                 f"Failed to load default font {default_font_path} size {default_font_size}: {e}"
             )
 
+    def append_measurement(self, measurement: Measurement):
+        """Record a measurement, overwriting the oldest once the history is full."""
+        i = self._idx
+        j = i + self.HISTORY_LENGTH
+        raw = measurement.raw_celsius
+        cal = measurement.calibrated_celsius
+        self._ts[i] = self._ts[j] = measurement.time
+        self._raw[i] = self._raw[j] = np.nan if raw is None else raw
+        self._cal[i] = self._cal[j] = np.nan if cal is None else cal
+        self._idx = (i + 1) % self.HISTORY_LENGTH
+        self._count = min(self._count + 1, self.HISTORY_LENGTH)
+        self.history_version += 1
+
+    def _history(self, ring: np.ndarray) -> np.ndarray:
+        """Return the valid part of a history ring buffer, oldest first (a view)."""
+        if self._count < self.HISTORY_LENGTH:
+            return ring[: self._count]
+        return ring[self._idx : self._idx + self.HISTORY_LENGTH]
+
     def load_font(self, font_path: str, font_size: float) -> Tuple[str, float]:
         """Load a font once and store it under a name."""
-        if not _p.exists(font_path):
-            raise FileNotFoundError(f"Font file not found: {font_path}")
         font_name = _p.splitext(_p.split(font_path)[1])[0]
         font_key = (font_name, font_size)
-        self.fonts[font_key] = ImageFont.truetype(font_path, font_size)
+        self.fonts[font_key] = _load_truetype(font_path, font_size)
+        # readouts are mostly digits; rasterize those up front rather than on
+        # the first frame that happens to need each one
+        for char in self.PRELOADED_GLYPHS:
+            self._get_glyph(font_key, char)
         return font_key
 
     def draw_text_block(
@@ -249,47 +424,312 @@ class Canvas:
         w, h = size
 
         if bg_color:
-            self.draw.rectangle([x0, y0, x0 + w, y0 + h], fill=bg_color)
+            self.fast_clear_rect((x0, y0, x0 + w + 1, y0 + h + 1), bg_color)
+
+        self.draw_glyph_run(text, (x0 + 5, y0 + 3), font_key, text_color)
+
+    def _get_glyph(self, font_key: Tuple[str, float], char: str):
+        """Rasterize a character once per font and keep its mask for reuse."""
+        glyph = self._glyphs.get((font_key, char))
+        if glyph is None:
+            font = self.fonts[font_key]
+            left, top, right, bottom = font.getbbox(char)
+            mask = None
+            if right > left and bottom > top:
+                mask = Image.new("L", (right - left, bottom - top), 0)
+                ImageDraw.Draw(mask).text((-left, -top), char, fill=255, font=font)
+            glyph = (mask, left, top, font.getlength(char))
+            self._glyphs[(font_key, char)] = glyph
+        return glyph
+
+    def preload_text(self, font_key: Tuple[str, float], texts):
+        """Build the masks of labels that are shown over and over, and never evict them."""
+        for text in texts:
+            self._static_text_masks[(text, font_key)] = self._build_text_mask(
+                text, font_key
+            )
 
-        font = self.fonts[font_key]
-        self.draw.text((x0 + 5, y0 + 3), text, fill=text_color, font=font)
+    def _get_text_mask(self, text: str, font_key: Tuple[str, float]):
+        """Return (mask, x offset, y offset) for a whole line of text, or None if blank."""
+        key = (text, font_key)
+        if key in self._static_text_masks:
+            return self._static_text_masks[key]
+        if key in self._text_masks:
+            self._text_masks.move_to_end(key)
+            return self._text_masks[key]
+
+        cached = self._build_text_mask(text, font_key)
+        self._text_masks[key] = cached
+        if len(self._text_masks) > self.TEXT_CACHE_SIZE:
+            self._text_masks.popitem(last=False)
+        return cached
+
+    def _build_text_mask(self, text: str, font_key: Tuple[str, float]):
+        # lay out the cached glyphs, then merge them into one mask
+        placed = []
+        x = 0.0
+        for char in text:
+            mask, left, top, advance = self._get_glyph(font_key, char)
+            if mask is not None:
+                placed.append((mask, round(x + left), top))
+            x += advance
+        if not placed:
+            return None
+
+        x_min = min(gx for _, gx, _ in placed)
+        y_min = min(gy for _, _, gy in placed)
+        x_max = max(gx + mask.width for mask, gx, _ in placed)
+        y_max = max(gy + mask.height for mask, _, gy in placed)
+        text_mask = Image.new("L", (x_max - x_min, y_max - y_min), 0)
+        for mask, gx, gy in placed:
+            box = (
+                gx - x_min,
+                gy - y_min,
+                gx - x_min + mask.width,
+                gy - y_min + mask.height,
+            )
+            # overlapping glyphs keep the stronger coverage, as FreeType does
+            text_mask.paste(ImageChops.lighter(text_mask.crop(box), mask), box)
+        return text_mask, x_min, y_min
+
+    def draw_glyph_run(self, text, pos, font_key, text_color):
+        """Draw single-line text by pasting a cached mask of it instead of calling FreeType."""
+        cached = self._get_text_mask(text, font_key)
+        if cached is None:
+            return
+        mask, dx, dy = cached
+        x, y = round(pos[0]) + dx, pos[1] + dy
+        self.image.paste(text_color, (x, y), mask)
+        self._mark_dirty((x, y, x + mask.width, y + mask.height))
+
+    def _mark_dirty(self, box: Tuple[int, int, int, int]):
+        """Remember a region that was drawn to, clipped to the canvas."""
+        width, height = self.image.size
+        x0, y0 = max(box[0], 0), max(box[1], 0)
+        x1, y1 = min(box[2], width), min(box[3], height)
+        if x1 > x0 and y1 > y0:
+            self._dirty.append((x0, y0, x1, y1))
 
     def clear(self, bg_color="WHITE"):
         """Clear the entire canvas."""
-        self.draw.rectangle([(0, 0), self.image.size], fill=bg_color)
+        # a plain fill, without ImageDraw's argument parsing
+        self.image.paste(bg_color, (0, 0) + self.image.size)
+        self._dirty.append((0, 0) + self.image.size)
+
+    def fast_clear_rect(self, box: Tuple[int, int, int, int], color):
+        """Fill the box (x0, y0, x1, y1), right and bottom edges excluded."""
+        self.image.paste(color, box)
+        self._mark_dirty(box)
+
+    def bake_background(self, draw_fn, bg_color="WHITE"):
+        """Pre-render the parts of the screen that never change by running draw_fn once."""
+        self.clear(bg_color)
+        draw_fn()
+        self._background = self.image.copy()
+        self._widgets.clear()
+        self._dirty = [(0, 0) + self.image.size]
+
+    def begin_frame(self):
+        """Reset the canvas to the cached background."""
+        self.image.paste(self._background)
+        self._dirty.append((0, 0) + self.image.size)
+
+    def repaint(self, widgets) -> bool:
+        """Redraw only the widgets whose state changed since the last call.
+
+        `widgets` lists (name, state, draw) in paint order; `draw` paints the
+        widget with this canvas' draw methods, or is None when the widget shows
+        nothing over the background. Returns False if nothing changed.
+        """
+        last = self._widgets
+        stale = {
+            name
+            for name, state, _ in widgets
+            if name not in last or last[name][0] != state
+        }
+        stale.update(last.keys() - {name for name, _, _ in widgets})  # removed
+        if not stale:
+            return False
+
+        # Clear where the stale widgets were, and repaint anything else that
+        # overlaps a cleared region, until no more widgets are pulled in
+        damage = [box for name in stale if name in last for box in last[name][1]]
+        grew = True
+        while grew:
+            grew = False
+            for name, (_, boxes) in last.items():
+                if name not in stale and _boxes_overlap(boxes, damage):
+                    stale.add(name)
+                    damage.extend(boxes)
+                    grew = True
+        for box in damage:
+            self.image.paste(self._background.crop(box), box[:2])
+        self._dirty.extend(damage)
+
+        drawn = {}
+        for name, state, draw in widgets:
+            if name in stale:
+                start = len(self._dirty)
+                if draw is not None:
+                    draw()
+                drawn[name] = (state, self._dirty[start:])
+
+        new_boxes = [box for _, boxes in drawn.values() for box in boxes]
+        if any(
+            name not in stale and _boxes_overlap(boxes, new_boxes)
+            for name, (_, boxes) in last.items()
+        ):
+            # a widget grew over one that was left alone; repaint everything
+            self.begin_frame()
+            self._widgets = {}
+            self.repaint(widgets)
+            return True
+
+        for name in stale - drawn.keys():
+            del last[name]
+        last.update(drawn)
+        return True
 
     def render_to_display(self, disp: ST7789.ST7789, rotate_angle=0, brightness=None):
         """Send the current canvas to the display."""
-        rotated_image = self.image.rotate(rotate_angle)
-        if brightness is not None:
+        # the backlight PWM is only touched when the level actually changes
+        if brightness is not None and brightness != self._applied_brightness:
             disp.bl_DutyCycle(brightness)
+            self._applied_brightness = brightness
         # logger.info(f"rendering image; pin value: {disp.GPIO_BL_PIN.value}")
-        disp.ShowImage(rotated_image)
+
+        dirty, self._dirty = self._dirty, []
+        fb = self._fb565
+        angle = rotate_angle % 360
+        fb_angle, self._fb565_angle = self._fb565_angle, angle
+        if fb is not None and fb_angle == angle and not dirty:
+            # neither the canvas nor the orientation changed; skip the rotation too
+            return
+
+        if (
+            angle == 0
+            and fb_angle == 0
+            and fb is not None
+            and fb.shape[::-1] == self.image.size
+        ):
+            # Nothing outside the drawn regions can differ from what the panel
+            # shows. Separate regions go out as separate windows, unless they
+            # cover most of the screen anyway.
+            if not dirty:
+                return
+            width, height = self.image.size
+            boxes = _merge_boxes(dirty)
+            area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in boxes)
+            if area > self.FULL_FRAME_FRACTION * width * height:
+                boxes = [(0, 0, width, height)]
+            for box in boxes:
+                region = _pack_rgb565(
+                    np.asarray(self.image.crop(box)),
+                    self._frame565[box[1] : box[3], box[0] : box[2]],
+                )
+                self._push_changes(disp, region, box[0], box[1])
+            return
+
+        if angle in self._QUARTER_TURNS:
+            # Pack the canvas as it is and turn the result as a strided view,
+            # rather than allocating a rotated copy of the image every frame
+            region = np.rot90(
+                _pack_rgb565(np.asarray(self.image), self._frame565),
+                self._QUARTER_TURNS[angle],
+            )
+        elif angle == 0:
+            region = _pack_rgb565(np.asarray(self.image), self._frame565)
+        else:
+            rotated_image = self.image.rotate(rotate_angle)
+            region = _pack_rgb565(np.asarray(rotated_image), self._frame565)
+        if fb is None or fb.shape != region.shape:
+            # a copy; region is the staging buffer, overwritten next frame
+            self._fb565 = region.copy()
+            disp.ShowRGB565Window(region, 0, 0)
+        else:
+            self._push_changes(disp, region, 0, 0)
+
+    def _push_changes(self, disp: ST7789.ST7789, region: np.ndarray, x0: int, y0: int):
+        """Send the bounding box of the pixels in region that differ from the panel."""
+        last = self._fb565[y0 : y0 + region.shape[0], x0 : x0 + region.shape[1]]
+        changed = region != last
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.size == 0:
+            return
+        cols = np.flatnonzero(changed.any(axis=0))
+        last[...] = region
+        x0 += int(cols[0])
+        y0 += int(rows[0])
+        x1 = x0 + int(cols[-1] - cols[0]) + 1
+        y1 = y0 + int(rows[-1] - rows[0]) + 1
+        disp.ShowRGB565Window(self._fb565[y0:y1, x0:x1], x0, y0)
 
     def draw_button(
         self, shape_type, shape_data, pressed, color_pressed=0, color_released=0xFF00
     ):
         """Draw a button in pressed/released state."""
+        sprite, mask, box = self._get_button_sprite(
+            shape_type, shape_data, color_pressed if pressed else color_released
+        )
+        self.image.paste(sprite, box, mask)
+        self._mark_dirty(box)
+
+    def preload_button(
+        self, shape_type, shape_data, color_pressed=0, color_released=0xFF00
+    ):
+        """Build the sprites of both button states ahead of the first draw."""
+        for fill in (color_pressed, color_released):
+            self._get_button_sprite(shape_type, shape_data, fill)
+
+    def _get_button_sprite(self, shape_type, shape_data, fill):
+        """Rasterize a button shape once into a small sprite and a mask of its pixels."""
+        key = (shape_type, tuple(shape_data), fill)
+        cached = self._button_sprites.get(key)
+        if cached is not None:
+            return cached
+
+        draw_fn = self._SHAPE_DRAWERS.get(shape_type)
+        if draw_fn is None:
+            raise ValueError(f"Unsupported shape {shape_type}")
         if shape_type == "polygon":
-            self.draw.polygon(
-                shape_data,
-                outline=255,
-                fill=color_pressed if pressed else color_released,
-            )
-        elif shape_type == "rectangle":
-            self.draw.rectangle(
-                shape_data,
-                outline=255,
-                fill=color_pressed if pressed else color_released,
-            )
-        elif shape_type == "ellipse":
-            self.draw.ellipse(
-                shape_data,
-                outline=255,
-                fill=color_pressed if pressed else color_released,
-            )
+            xs, ys = zip(*shape_data)
+            box = (min(xs), min(ys), max(xs) + 1, max(ys) + 1)
         else:
-            raise ValueError(f"Unsupported shape {shape_type}")
+            x0, y0, x1, y1 = shape_data
+            box = (x0, y0, x1 + 1, y1 + 1)
+
+        def draw_shape(image, **kwargs):
+            draw_fn(ImageDraw.Draw(image), shape_data, **kwargs)
+
+        # Draw at the real coordinates and crop: polygon edges are rounded
+        # from absolute positions, so a shifted shape can differ by a pixel
+        sprite = Image.new(self.image.mode, box[2:])
+        draw_shape(sprite, outline=255, fill=fill)
+        # fill and outline as two passes, like the sprite; given the same
+        # color for both, PIL skips the outline pass and covers fewer pixels
+        mask = Image.new("L", box[2:], 0)
+        draw_shape(mask, fill=255)
+        draw_shape(mask, outline=255)
+
+        cached = (sprite.crop(box), mask.crop(box), box)
+        self._button_sprites[key] = cached
+        return cached
+
+    def _get_sparkline_grid(self, w, h, min_temp, max_temp) -> np.ndarray:
+        """Palette-index template of the sparkline's empty grid, built once per layout."""
+        key = (w, h, min_temp, max_temp)
+        grid = self._grid_cache.get(key)
+        if grid is None:
+            grid = np.full((h + 3, w + 3), self._SPARK_BG, dtype=np.uint8)
+            # Draw horizontal grid lines
+            grid[1, 1 : w + 2] = self._SPARK_TOP
+            grid[h + 1, 1 : w + 2] = self._SPARK_BOTTOM
+            for grid_temp in range(int(min_temp) + 10, int(max_temp), 10):
+                norm = (grid_temp - min_temp) / (max_temp - min_temp)
+                norm = max(0.0, min(1.0, norm))  # clamp
+                grid[h + 1 - int(norm * h), 1 : w + 2] = self._SPARK_GRID
+            self._grid_cache[key] = grid
+        return grid
 
     def draw_temperature_sparkline(
         self,
@@ -301,62 +741,187 @@ class Canvas:
         point_color="BLACK",
         grid_color=(200, 200, 200),
     ):
-        """Draw a simple sparkline from temperature_records at the given position, with optional grid lines."""
+        """Draw a simple sparkline from the measurement history at the given position, with optional grid lines."""
         x0, y0 = pos
         w, h = size
 
-        if not self.temperature_records:
+        if self._count == 0:
             logging.info("No temperature records to draw.")
             return
 
-        # Draw horizontal grid lines
-        self.draw.line([(x0, y0), (x0 + w, y0)], fill=(0, 255, 255))
-        self.draw.line([(x0, y0 + h), (x0 + w, y0 + h)], fill=(0, 0, 255))
-        for grid_temp in range(int(min_temp) + 10, int(max_temp), 10):
-            norm = (grid_temp - min_temp) / (max_temp - min_temp)
-            norm = max(0.0, min(1.0, norm))  # clamp
-            y = y0 + h - int(norm * h)
-            self.draw.line([(x0, y), (x0 + w, y)], fill=grid_color)
-
-        num_points = len(self.temperature_records)
-        if num_points == 0:
-            return
+        stamp = self._POINT_STAMPS.get(point_style)
+        if stamp is None:
+            raise ValueError(f"Unknown point style: {point_style}")
+
+        # Compose the whole region in one array of palette indices and paste it
+        # once. It spans (x0, y0)..(x0 + w, y0 + h) plus a 1px margin so edge
+        # points keep their full footprint.
+        grid = self._get_sparkline_grid(w, h, min_temp, max_temp)
+        buf = self._spark_buf
+        if buf is None or buf.shape != grid.shape:
+            buf = self._spark_buf = np.empty_like(grid)
+        buf[...] = grid
+
+        temps = self._history(self._cal)
+        x_step = w / max(len(temps) - 1, 1)  # avoid div0
+        _scatter_sparkline_points(
+            buf,
+            temps,
+            float(min_temp),
+            float(max_temp),
+            x_step,
+            h,
+            stamp,
+            self._SPARK_POINT,
+        )
+
+        spark = Image.fromarray(buf)
+        spark.putpalette(
+            (255, 255, 255, 0, 255, 255, 0, 0, 255)
+            + tuple(_to_rgb(grid_color))
+            + tuple(_to_rgb(point_color))
+        )
+        self.image.paste(spark, (x0 - 1, y0 - 1))
+        self._mark_dirty((x0 - 1, y0 - 1, x0 + w + 2, y0 + h + 2))
+
+
+def _scatter_sparkline_points_py(
+    buf, temps, min_temp, max_temp, x_step, h, stamp, value
+):
+    for i in range(temps.shape[0]):
+        t = temps[i]
+        # missing readings are NaN and skipped, but still take an x slot
+        if np.isnan(t):
+            continue
+        norm = min(max((t - min_temp) / (max_temp - min_temp), 0.0), 1.0)
+        y = h + 1 - int(norm * h)  # invert y so higher temp is higher up
+        x = 1 + int(i * x_step)
+        for k in range(stamp.shape[0]):
+            buf[y + stamp[k, 1], x + stamp[k, 0]] = value
+
+
+# One body for both: compiled when numba is installed, otherwise the plain loop,
+# which is quick enough for the ~100 readings of the history
+_scatter_sparkline_points = (
+    njit(cache=True)(_scatter_sparkline_points_py)
+    if njit is not None
+    else _scatter_sparkline_points_py
+)
 
-        x_step = w / max(num_points - 1, 1)  # avoid div0
+if njit is not None:
+    # Compile (or load from numba's cache) now, with the argument types
+    # draw_temperature_sparkline passes, rather than inside the first redraw
+    _scatter_sparkline_points(
+        np.zeros((4, 4), dtype=np.uint8),
+        np.zeros(1),
+        0.0,
+        1.0,
+        1.0,
+        1,
+        np.zeros((1, 2), dtype=np.intp),
+        1,
+    )
 
-        for idx, measurement in enumerate(self.temperature_records):
-            temp = measurement.calibrated_celsius
-            if temp is None:
-                continue
-            norm = (temp - min_temp) / (max_temp - min_temp)
-            norm = max(0.0, min(1.0, norm))  # clamp
 
-            y = y0 + h - int(norm * h)  # invert y so higher temp is higher up
-            x = int(x0 + idx * x_step)
+if njit is not None:
+
+    @njit(cache=True)
+    def _pack_rgb565_bytes(rgb, out):
+        # numba has no big-endian dtypes, so write the two bytes of each pixel
+        for y in range(rgb.shape[0]):
+            for x in range(rgb.shape[1]):
+                r = rgb[y, x, 0]
+                g = rgb[y, x, 1]
+                b = rgb[y, x, 2]
+                out[y, x, 0] = (r & 0xF8) | (g >> 5)
+                out[y, x, 1] = ((g << 3) & 0xE0) | (b >> 3)
+
+else:
+    _pack_rgb565_bytes = None
+
+
+def _pack_rgb565(rgb: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convert an (h, w, 3) uint8 RGB array to the panel's big-endian RGB565.
+
+    Writes into `out`, an (h, w) ">u2" array, if given, and returns it.
+    """
+    if out is None:
+        out = np.empty(rgb.shape[:2], dtype=">u2")
+    if _pack_rgb565_bytes is not None:
+        # the two bytes of each pixel, high byte first
+        _pack_rgb565_bytes(rgb, out[..., np.newaxis].view(np.uint8))
+        return out
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    # build the high and low byte in uint8 and widen once, instead of
+    # widening each channel; uint8 shifts drop the bits the mask would
+    hi = (r & 0xF8) | (g >> 5)
+    lo = (g << 3) & 0xE0 | (b >> 3)
+    out[...] = hi.astype(np.uint16) << 8 | lo
+    return out
+
+
+if _pack_rgb565_bytes is not None:
+    # compile now for the frames and the dirty regions (a slice of the staging
+    # buffer, so a non-contiguous output) instead of inside the first upload
+    _pack_rgb565(np.asarray(Image.new("RGB", (2, 2))), np.empty((2, 2), ">u2"))
+    _pack_rgb565(np.asarray(Image.new("RGB", (1, 1))), np.empty((2, 2), ">u2")[:1, :1])
+
+
+def _merge_boxes(boxes) -> List[Tuple[int, int, int, int]]:
+    """Merge overlapping boxes until the remaining ones are disjoint."""
+    merged: List[Tuple[int, int, int, int]] = []
+    for box in boxes:
+        # absorb every merged box this one overlaps; repeat since the grown box
+        # may now reach others
+        while True:
+            hits = [m for m in merged if _boxes_overlap((m,), (box,))]
+            if not hits:
+                break
+            merged = [m for m in merged if m not in hits]
+            box = _union_box(hits + [box])
+        merged.append(box)
+    return merged
+
+
+def _union_box(boxes) -> Tuple[int, int, int, int]:
+    x0s, y0s, x1s, y1s = zip(*boxes)
+    return min(x0s), min(y0s), max(x1s), max(y1s)
+
+
+def _boxes_overlap(boxes_a, boxes_b) -> bool:
+    return any(
+        a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+        for a in boxes_a
+        for b in boxes_b
+    )
+
 
-            if point_style == "square":
-                self.draw.rectangle([x - 1, y - 1, x + 1, y + 1], fill=point_color)
-            elif point_style == "circle":
-                self.draw.ellipse([x - 1, y - 1, x + 1, y + 1], fill=point_color)
-            else:
-                raise ValueError(f"Unknown point style: {point_style}")
+def _to_rgb(color) -> Tuple[int, int, int]:
+    if isinstance(color, str):
+        return ImageColor.getrgb(color)[:3]
+    return color
 
 
+@dataclass(frozen=True, slots=True)
 class HeatingMode:
     NAME: str
-    upper_limit: float
     lower_limit: float
-
-    def __init__(
-        self, name: str, lower: float, upper: float, display_name: str | None = None
-    ):
-        self.NAME = name
-        self.lower_limit = lower
-        self.upper_limit = upper
-        self.display_name = display_name or name
+    upper_limit: float
+    display_name: Optional[str] = None
+    # what __str__ returns; the mode never changes, so it is formatted once
+    _label: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.display_name is None:
+            object.__setattr__(self, "display_name", self.NAME)
+        object.__setattr__(
+            self,
+            "_label",
+            f"[{self.display_name}] {self.lower_limit:.2f} ~ {self.upper_limit:.2f}",
+        )
 
     def __str__(self):
-        return f"[{self.display_name}] {self.lower_limit:.2f} ~ {self.upper_limit:.2f}"
+        return self._label
 
 
 class HeatingController:
@@ -367,6 +932,14 @@ class HeatingController:
         HeatingMode("greek yogurt", 42.0, 43.0, display_name="greek"),
         HeatingMode("free", 0.0, 100.0),
     ]
+    _MODE_BY_NAME: Dict[str, HeatingMode] = {m.NAME: m for m in AVAILABLE_MODES}
+    # mode name -> the mode KEY2 cycles to next
+    _NEXT_MODE: Dict[str, HeatingMode] = {
+        m.NAME: following
+        for m, following in zip(
+            AVAILABLE_MODES, AVAILABLE_MODES[1:] + AVAILABLE_MODES[:1]
+        )
+    }
 
     _power_status: Literal["on", "off"]
 
@@ -378,17 +951,18 @@ class HeatingController:
 
     def __init__(self, mode: str):
         # Private constructor
-        matching_modes = [m for m in self.AVAILABLE_MODES if m.NAME == mode]
-        if not matching_modes:
-            raise ValueError(f"No heating mode named '{mode}' found.")
-        self._current_mode = matching_modes[0]
+        self.change_to_mode(mode)
         self.turn_on()
 
     def change_to_mode(self, new_mode: str):
-        matching_modes = [m for m in self.AVAILABLE_MODES if m.NAME == new_mode]
-        if not matching_modes:
-            raise ValueError(f"No heating mode named '{new_mode}' found.")
-        self._current_mode = matching_modes[0]
+        try:
+            self._current_mode = self._MODE_BY_NAME[new_mode]
+        except KeyError:
+            raise ValueError(f"No heating mode named '{new_mode}' found.") from None
+
+    def cycle_mode(self):
+        """Switch to the mode after the current one, wrapping around."""
+        self._current_mode = self._NEXT_MODE[self._current_mode.NAME]
 
     def get_current_heating_mode(self) -> HeatingMode:
         return self._current_mode
@@ -396,61 +970,51 @@ class HeatingController:
     def get_power_status(self):
         return self._power_status
 
-    # NOTE we have a relay with internal pull-up
-    # so ANY floating signal leads it to turn on
-    # so to turn off, we shut the GPIO
+    # NOTE we have a relay with internal pull-up, so to turn it off the pin
+    # is released (switched to input), as it always was. Driving the pin high
+    # is a single write instead of a pin function change, but is only done
+    # when heat_plate_relay_tristate is turned off for a relay known to
+    # switch off that way.
     def turn_off(self):
         self._power_status = "off"
-        GPIO.setup(CONFIG.heat_plate_relay_gpio, GPIO.IN)
+        if CONFIG.heat_plate_relay_tristate:
+            heat_plate_relay.pin.function = "input"
+        else:
+            heat_plate_relay.off()
 
     def turn_on(self):
         self._power_status = "on"
-        GPIO.setup(CONFIG.heat_plate_relay_gpio, GPIO.OUT)
+        if CONFIG.heat_plate_relay_tristate:
+            heat_plate_relay.pin.function = "output"
+        heat_plate_relay.on()
 
 
 def handle_key_1(button_name, button_config):
-    current_brightness_index = DisplayConfig.LCD_BRIGHTNESS_LEVELS.index(
-        DisplayConfig.LCD_BRIGHTNESS
-    )
-    next_index = (current_brightness_index + 1) % len(
-        DisplayConfig.LCD_BRIGHTNESS_LEVELS
-    )
-    DisplayConfig.update_brightness(DisplayConfig.LCD_BRIGHTNESS_LEVELS[next_index])
+    DisplayConfig.cycle_brightness()
     logger.info("LCD brightness changed to: %d", DisplayConfig.LCD_BRIGHTNESS)
 
 
 def handle_key_2(button_name, button_config):
-    current_mode_index = HeatingController.AVAILABLE_MODES.index(
-        HeatingController.get_instance().get_current_heating_mode()
-    )
-    next_index = (current_mode_index + 1) % len(HeatingController.AVAILABLE_MODES)
-    HeatingController.get_instance().change_to_mode(
-        HeatingController.AVAILABLE_MODES[next_index].NAME
-    )
-    logger.info(
-        "key 2 %s, new mode: %s",
-        button_name,
-        HeatingController.get_instance().get_current_heating_mode(),
-    )
+    ctrl = HeatingController.get_instance()
+    ctrl.cycle_mode()
+    logger.info("key 2 %s, new mode: %s", button_name, ctrl.get_current_heating_mode())
 
 
 def handle_key_3(button_name, button_config):
-    current_heating_mode = HeatingController.get_instance().get_current_heating_mode()
-    if current_heating_mode.NAME == "free":
+    ctrl = HeatingController.get_instance()
+    if ctrl.get_current_heating_mode().NAME == "free":
         # In free mode, toggle power
-        current_power_status = HeatingController.get_instance().get_power_status()
-        if current_power_status == "off":
-            HeatingController.get_instance().turn_on()
+        if ctrl.get_power_status() == "off":
+            ctrl.turn_on()
         else:
-            HeatingController.get_instance().turn_off()
-        logger.info(
-            "relay status: %s", HeatingController.get_instance().get_power_status()
-        )
+            ctrl.turn_off()
+        logger.info("relay status: %s", ctrl.get_power_status())
     else:
         # In other modes, toggle MQTT push state
-        CONFIG.mqtt.should_push = not CONFIG.mqtt.should_push
+        mqtt_config = CONFIG.mqtt
+        mqtt_config.should_push = not mqtt_config.should_push
         logger.info(
-            "MQTT push state: %s", "enabled" if CONFIG.mqtt.should_push else "disabled"
+            "MQTT push state: %s", "enabled" if mqtt_config.should_push else "disabled"
         )
 
 
@@ -510,14 +1074,60 @@ BUTTON_CONFIG = {
 }
 
 
-def poll_buttons(disp: ST7789.ST7789):
-    states = {}
+BUTTON_BOUNCE_SECONDS = 0.2
+
+# (bit, name, shape, shape data) per button, resolved once so drawing does no
+# config lookups; a tuple avoids building a dict view each time
+_BUTTONS = tuple(
+    (
+        1 << i,
+        name,
+        cfg["shape"],
+        tuple(cfg["points"]) if cfg["shape"] == "polygon" else cfg["bbox"],
+    )
+    for i, (name, cfg) in enumerate(BUTTON_CONFIG.items())
+)
+_BUTTON_BITS = {name: bit for bit, name, _, _ in _BUTTONS}
+# bit set while the button is held down; 0 when idle
+pressed_buttons = 0
+
+# Set whenever something visible changes; the screen is only redrawn then.
+redraw_needed = asyncio.Event()
+
+
+def register_button_callbacks(loop: asyncio.AbstractEventLoop):
+    # gpiozero runs these on its own thread; hand each edge over to the event loop
     for name, cfg in BUTTON_CONFIG.items():
-        pressed = (
-            disp.digital_read(cfg["pin"]) != 0
-        )  # 0=released, 1=pressed in Waveshare logic
-        states[name] = pressed
-    return states
+        device = cfg["pin"]
+        device.pin.bounce = BUTTON_BOUNCE_SECONDS
+        # pull-up inputs: active (low) means pressed
+        device.when_activated = lambda n=name: loop.call_soon_threadsafe(
+            handle_button_edge, n, True
+        )
+        device.when_deactivated = lambda n=name: loop.call_soon_threadsafe(
+            handle_button_edge, n, False
+        )
+
+
+def unregister_button_callbacks():
+    for cfg in BUTTON_CONFIG.values():
+        cfg["pin"].when_activated = None
+        cfg["pin"].when_deactivated = None
+
+
+def handle_button_edge(name: str, pressed: bool):
+    global pressed_buttons
+    if pressed:
+        pressed_buttons |= _BUTTON_BITS[name]
+    else:
+        pressed_buttons &= ~_BUTTON_BITS[name]
+    redraw_needed.set()
+    if pressed:
+        cfg = BUTTON_CONFIG[name]
+        maybe_handler = cfg.get("handler")
+        logger.debug("button %s pressed, handler: %s", name, maybe_handler)
+        if maybe_handler is not None:
+            maybe_handler(name, cfg)
 
 
 canvas = Canvas(disp.width, disp.height)
@@ -526,156 +1136,251 @@ canvas = Canvas(disp.width, disp.height)
 font0 = canvas.load_font("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", 36)
 font1 = canvas.load_font("/usr/share/fonts/truetype/freefont/FreeSerifItalic.ttf", 28)
 
+
+def _draw_released_buttons():
+    for _, _, shape, shape_data in _BUTTONS:
+        canvas.draw_button(shape, shape_data, pressed=False)
+
+
+canvas.bake_background(_draw_released_buttons)
+# rasterize the pressed sprites now rather than on the first press
+for _, _, shape, shape_data in _BUTTONS:
+    canvas.preload_button(shape, shape_data)
+# the mode and MQTT labels only ever take these values
+canvas.preload_text(font1, [str(m) for m in HeatingController.AVAILABLE_MODES])
+canvas.preload_text(font0, ["PUSH", "DROP"])
+
 TEMPERATURE_POLL_FREQUENCY_SECONDS = 10
-LAST_POLL_TIME = time.time() - TEMPERATURE_POLL_FREQUENCY_SECONDS
 
-try:
-    while True:
-        # 1. Poll button states
-        button_states = poll_buttons(disp)
-
-        # 2. Clear canvas
-        canvas.clear(bg_color="WHITE")
-
-        # 3. Draw all buttons based on state
-        for name, cfg in BUTTON_CONFIG.items():
-            pressed = button_states[name]
-            if cfg["shape"] == "polygon":
-                canvas.draw_button("polygon", cfg["points"], pressed)
-            else:
-                canvas.draw_button(cfg["shape"], cfg["bbox"], pressed)
-
-            if pressed:
-                maybe_handler = cfg.get("handler")
-                print(name, maybe_handler)
-                if maybe_handler is not None:
-                    maybe_handler(name, cfg)
-
-        current_heating_mode = (
-            HeatingController.get_instance().get_current_heating_mode()
-        )
-        tN = time.time()
-        if tN - LAST_POLL_TIME > TEMPERATURE_POLL_FREQUENCY_SECONDS:
-            LAST_POLL_TIME = tN
-
-            latest_measurement = TemperatureGetter.get_current_measurement()
-            power_status = HeatingController.get_instance().get_power_status()
-
-            if latest_measurement.raw_celsius is None:
-                logger.warning("No temperature measurement available")
-                time.sleep(5)
-                continue
-            canvas.temperature_records.append(latest_measurement)
-
-            logger.info(
-                "[%s] Temperature: %.2f°C (raw: %.2f°C), Power: %s",
-                current_heating_mode,
-                latest_measurement.calibrated_celsius,
-                latest_measurement.raw_celsius,
-                power_status,
-            )
+latest_measurement: Optional[Measurement] = None
+
+
+# mode name -> last part of the MQTT topic, where it differs from the name
+_TOPIC_POSTFIXES = {"natto": "inside natto bowl", "yogurt": "inside yogurt bowl"}
 
-            if current_heating_mode.NAME == "natto":
-                topic_postfix = "inside natto bowl"
-            elif current_heating_mode.NAME == "yogurt":
-                topic_postfix = "inside yogurt bowl"
-            else:
-                topic_postfix = current_heating_mode.NAME
-            topic = f"environment/sensors/devices/{topic_postfix}"
-            payload = {
-                "temper_temperature": f"{latest_measurement.raw_celsius}C",
-                "corrected_temperature": f"{latest_measurement.calibrated_celsius}C",
-                "heat_plate_power": power_status,
-            }
-            if CONFIG.mqtt.should_push and current_heating_mode.NAME != "free":
-                mqtt_publish(
-                    CONFIG.mqtt.host, CONFIG.mqtt.port, topic, json.dumps(payload)
-                )
-            else:
-                logger.debug("MQTT payload: %s", payload)
-
-            if (
-                power_status == "off"
-                and latest_measurement.calibrated_celsius
-                < current_heating_mode.lower_limit
-            ):
-                logger.info(
-                    "Temperature too low (%.2f < %.2f); turning on",
-                    latest_measurement.calibrated_celsius,
-                    current_heating_mode.lower_limit,
-                )
-                HeatingController.get_instance().turn_on()
-            elif (
-                power_status == "on"
-                and latest_measurement.calibrated_celsius
-                > current_heating_mode.upper_limit
-            ):
-                logger.info(
-                    "Temperature too high (%.2f > %.2f); turning off",
-                    latest_measurement.calibrated_celsius,
-                    current_heating_mode.upper_limit,
-                )
-                HeatingController.get_instance().turn_off()
-            else:
-                logger.debug(
-                    "Temperature within bounds (%.2f < %.2f < %.2f)",
-                    current_heating_mode.lower_limit,
-                    latest_measurement.calibrated_celsius,
-                    current_heating_mode.upper_limit,
-                )
 
-        # Draw temperature and mode
-        canvas.draw_text_block(
-            text=f"{current_heating_mode}",
-            pos=(0, 115),
-            size=(190, 45),
-            font_name=font1[0],
-            font_size=font1[1],
-            text_color="RED",
+def handle_measurement(measurement: Measurement):
+    """Publish a new reading and switch the heat plate to stay within the mode limits."""
+    global latest_measurement
+
+    ctrl = HeatingController.get_instance()
+    current_heating_mode = ctrl.get_current_heating_mode()
+    latest_measurement = measurement
+    power_status = ctrl.get_power_status()
+    redraw_needed.set()
+
+    if latest_measurement.raw_celsius is None:
+        logger.warning("No temperature measurement available")
+        return
+    canvas.append_measurement(latest_measurement)
+
+    logger.info(
+        "[%s] Temperature: %.2f°C (raw: %.2f°C), Power: %s",
+        current_heating_mode,
+        latest_measurement.calibrated_celsius,
+        latest_measurement.raw_celsius,
+        power_status,
+    )
+
+    should_publish = CONFIG.mqtt.should_push and current_heating_mode.NAME != "free"
+    # the payload is only built when it is sent or logged
+    if should_publish or logger.isEnabledFor(logging.DEBUG):
+        topic_postfix = _TOPIC_POSTFIXES.get(
+            current_heating_mode.NAME, current_heating_mode.NAME
+        )
+        topic = f"environment/sensors/devices/{topic_postfix}"
+        # Same bytes json.dumps would produce for this fixed shape; the values
+        # are floats and "on"/"off", so nothing needs escaping.
+        payload = (
+            f'{{"temper_temperature": "{latest_measurement.raw_celsius}C", '
+            f'"corrected_temperature": "{latest_measurement.calibrated_celsius}C", '
+            f'"heat_plate_power": "{power_status}"}}'
+        )
+        if should_publish:
+            mqtt_publisher.publish(topic, payload)
+        else:
+            logger.debug("MQTT payload: %s", payload)
+
+    if (
+        power_status == "off"
+        and latest_measurement.calibrated_celsius < current_heating_mode.lower_limit
+    ):
+        logger.info(
+            "Temperature too low (%.2f < %.2f); turning on",
+            latest_measurement.calibrated_celsius,
+            current_heating_mode.lower_limit,
+        )
+        ctrl.turn_on()
+    elif (
+        power_status == "on"
+        and latest_measurement.calibrated_celsius > current_heating_mode.upper_limit
+    ):
+        logger.info(
+            "Temperature too high (%.2f > %.2f); turning off",
+            latest_measurement.calibrated_celsius,
+            current_heating_mode.upper_limit,
         )
+        ctrl.turn_off()
+    else:
+        logger.debug(
+            "Temperature within bounds (%.2f < %.2f < %.2f)",
+            current_heating_mode.lower_limit,
+            latest_measurement.calibrated_celsius,
+            current_heating_mode.upper_limit,
+        )
+
 
-        # Draw MQTT status in top right
-        mqtt_status = "PUSH" if CONFIG.mqtt.should_push else "DROP"
-        mqtt_color = "GREEN" if CONFIG.mqtt.should_push else "RED"
-        canvas.draw_text_block(
-            text=mqtt_status,
-            pos=(disp.width - 60, 0),  # Right side of screen
-            size=(50, 20),
-            font_name=font0[0],
-            font_size=font0[1],
-            text_color=mqtt_color,
-            bg_color="WHITE",
+def redraw():
+    """Repaint the parts of the canvas whose state changed."""
+    # Released buttons are part of the background; only pressed ones are drawn
+    # (a released button is dropped from the list, which clears it)
+    # bound once; the widget callbacks below all draw through it
+    draw_text_block = canvas.draw_text_block
+    widgets = []
+    mask = pressed_buttons
+    if mask:
+        for bit, name, shape, shape_data in _BUTTONS:
+            if mask & bit:
+                widgets.append(
+                    (
+                        name,
+                        True,
+                        lambda s=shape, d=shape_data: canvas.draw_button(
+                            s, d, pressed=True
+                        ),
+                    )
+                )
+
+    # Draw temperature and mode
+    mode_text = f"{HeatingController.get_instance().get_current_heating_mode()}"
+    widgets.append(
+        (
+            "mode",
+            mode_text,
+            lambda: draw_text_block(
+                text=mode_text,
+                pos=(0, 115),
+                size=(190, 45),
+                font_name=font1[0],
+                font_size=font1[1],
+                text_color="RED",
+            ),
         )
+    )
 
-        if latest_measurement.raw_celsius is not None:
-            # Draw blocks with optional font or fallback
-            canvas.draw_text_block(
-                text=f"{latest_measurement.calibrated_celsius:.2f} C",
-                pos=(0, 65),
-                size=(140, 35),
+    # Draw MQTT status in top right
+    should_push = CONFIG.mqtt.should_push
+    mqtt_status = "PUSH" if should_push else "DROP"
+    mqtt_color = "GREEN" if should_push else "RED"
+    widgets.append(
+        (
+            "mqtt",
+            mqtt_status,
+            lambda: draw_text_block(
+                text=mqtt_status,
+                pos=(disp.width - 60, 0),  # Right side of screen
+                size=(50, 20),
                 font_name=font0[0],
                 font_size=font0[1],
-                text_color="BLACK",
+                text_color=mqtt_color,
                 bg_color="WHITE",
+            ),
+        )
+    )
+
+    if latest_measurement is not None and latest_measurement.raw_celsius is not None:
+        # Draw blocks with optional font or fallback
+        temperature_text = f"{latest_measurement.calibrated_celsius:.2f} C"
+        widgets.append(
+            (
+                "temperature",
+                temperature_text,
+                lambda: draw_text_block(
+                    text=temperature_text,
+                    pos=(0, 65),
+                    size=(140, 35),
+                    font_name=font0[0],
+                    font_size=font0[1],
+                    text_color="BLACK",
+                    bg_color="WHITE",
+                ),
             )
+        )
 
-            # Draw temperature sparkline
-            canvas.draw_temperature_sparkline(
-                pos=(0, disp.height - 60 - 5),
-                size=(disp.width, 60),  # size of the region
-                point_style="square",
-                point_color="BLACK",
+        # Draw temperature sparkline
+        widgets.append(
+            (
+                "sparkline",
+                canvas.history_version,
+                lambda: canvas.draw_temperature_sparkline(
+                    pos=(0, disp.height - 60 - 5),
+                    size=(disp.width, 60),  # size of the region
+                    point_style="square",
+                    point_color="BLACK",
+                ),
             )
+        )
 
-        # 4. Render to screen
-        canvas.render_to_display(disp)
+    canvas.repaint(widgets)
 
-        if DisplayConfig.brightness_changed():
-            # aggressive brightness update seems to freeze the device at some point!
-            disp.bl_DutyCycle(DisplayConfig.LCD_BRIGHTNESS)
-            logger.debug("Updated LCD brightness to: %d", DisplayConfig.LCD_BRIGHTNESS)
 
-        time.sleep(0.5)  # Small sleep for CPU relief (adjust frame rate)
+async def poll_temperature(executor: ThreadPoolExecutor):
+    """Read the sensor periodically; the blocking USB read runs on `executor`."""
+    loop = asyncio.get_running_loop()
+    # deadlines on the loop's monotonic clock, so the period does not stretch by
+    # the duration of each read and is unaffected by wall clock adjustments
+    next_poll = loop.time()
+    while True:
+        measurement = await loop.run_in_executor(
+            executor, TemperatureGetter.get_current_measurement
+        )
+        handle_measurement(measurement)
+        next_poll += TEMPERATURE_POLL_FREQUENCY_SECONDS
+        now = loop.time()
+        if next_poll < now:  # fell behind (slow read); don't try to catch up
+            next_poll = now + TEMPERATURE_POLL_FREQUENCY_SECONDS
+        await asyncio.sleep(next_poll - now)
+
+
+async def render_on_change(executor: ThreadPoolExecutor):
+    """Redraw on every change; the SPI upload runs on `executor`."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await redraw_needed.wait()
+        redraw_needed.clear()
+        redraw()
+        # Button edges and readings are still handled during the transfer; the
+        # next redraw waits for it, so the thread never sees a half-drawn frame.
+        # Aggressive brightness update seems to freeze the device at some
+        # point, so render_to_display only applies it when it changed.
+        await loop.run_in_executor(
+            executor,
+            functools.partial(
+                canvas.render_to_display,
+                disp,
+                brightness=DisplayConfig.LCD_BRIGHTNESS,
+            ),
+        )
+
+
+async def main():
+    register_button_callbacks(asyncio.get_running_loop())
+    temper_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="temper")
+    display_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="display")
+    redraw_needed.set()
+    try:
+        await asyncio.gather(
+            poll_temperature(temper_executor), render_on_change(display_executor)
+        )
+    finally:
+        unregister_button_callbacks()
+        temper_executor.shutdown(wait=False)
+        # let a transfer in flight finish before the SPI device is closed
+        display_executor.shutdown(wait=True)
+
+
+try:
+    asyncio.run(main())
 
 except KeyboardInterrupt as e:
     logger.info("Exiting cleanly: %s", e)
@@ -696,5 +1401,6 @@ except Exception as e:
     else:
         logger.error("UNHANDLED EXCEPTION: %s", e)
 
-GPIO.cleanup()
+mqtt_publisher.close()
+heat_plate_relay.close()
 disp.module_exit()